@@ -6,26 +6,39 @@ Module:     from clean import run_clean
 
 from __future__ import annotations
 
+import functools
 import json
 import logging
 import sys
 from datetime import datetime
 from pathlib import Path
 
+from pydantic import TypeAdapter
+
 from validate import CleanRow, ValidatedRow
 
 logger = logging.getLogger(__name__)
 
+# Compiled once — validates each JSONL line in pydantic-core rather than
+# constructing ValidatedRows through Python __init__.
+_VALIDATED_ROW_ADAPTER = TypeAdapter(ValidatedRow)
+
+# Compiled once — serializes CleanRows to JSONL lines without the per-call
+# serializer setup that row.model_dump_json() repeats.
+_CLEAN_ROW_ADAPTER = TypeAdapter(CleanRow)
+
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 
+@functools.lru_cache(maxsize=256)
 def _prev_month_date(year_month: str) -> str:
     """Given 'YYYY-MM', return the first of the preceding month as 'YYYY-MM-DD'.
 
-    Handles January → December wrap (year decrements).
+    Handles January → December wrap (year decrements). Cached — a run sees
+    the same handful of months across all fifty states.
     """
     year, month = map(int, year_month.split("-"))
     month -= 1
@@ -35,12 +48,12 @@ def _prev_month_date(year_month: str) -> str:
     return f"{year}-{month:02d}-01"
 
 
-def _dedupe(rows: list[dict], key_fields: tuple[str, ...]) -> list[dict]:
-    """Deduplicate a list of dicts by a composite key.  Returns first occurrence."""
+def _dedupe(rows: list[ValidatedRow], key_fn) -> list[ValidatedRow]:
+    """Deduplicate rows by a composite key function.  Returns first occurrence."""
     seen: set[tuple] = set()
-    deduped: list[dict] = []
+    deduped: list[ValidatedRow] = []
     for row in rows:
-        key = tuple(row.get(f) for f in key_fields)
+        key = key_fn(row)
         if key in seen:
             logger.info("clean: deduped row (key=%s)", key)
             continue
@@ -55,12 +68,16 @@ def _dedupe(rows: list[dict], key_fields: tuple[str, ...]) -> list[dict]:
 
 
 def _pivot_row(row: ValidatedRow, ingest_run: str) -> list[CleanRow]:
-    """Pivot one wide ValidatedRow into 1-2 long-format CleanRows."""
+    """Pivot one wide ValidatedRow into 1-2 long-format CleanRows.
+
+    Fields were already validated at ingest, so rows are built with
+    model_construct rather than re-running pydantic validation per row.
+    """
     results: list[CleanRow] = []
 
     # Current-month row — always emitted (rate is non-None because is_publishable)
     current_date = f"{row.month_canonical}-01"
-    results.append(CleanRow(
+    results.append(CleanRow.model_construct(
         state_canonical=row.state_canonical,
         state_code=row.state_code,
         date=current_date,
@@ -73,7 +90,7 @@ def _pivot_row(row: ValidatedRow, ingest_run: str) -> list[CleanRow]:
     # Prev-month row — only if prev value is present
     if row.unemployment_rate_prev_month is not None:
         prev_date = _prev_month_date(row.month_canonical)
-        results.append(CleanRow(
+        results.append(CleanRow.model_construct(
             state_canonical=row.state_canonical,
             state_code=row.state_code,
             date=prev_date,
@@ -101,9 +118,10 @@ def run_clean(
     Returns:
         List of CleanRow objects appended this run.
     """
+    now = datetime.now()
     if run_id is None:
-        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-    ingest_run_ts = datetime.now().isoformat()
+        run_id = now.strftime("%Y%m%d_%H%M%S")
+    ingest_run_ts = now.isoformat()
 
     # --- load from disk if not passed in-process ---
     if validated_rows is None:
@@ -111,63 +129,91 @@ def run_clean(
         manifest = json.loads(manifest_path.read_text())
         rows_path = Path(manifest["rows_file"])
         logger.info("clean: reading validated rows from %s", rows_path)
-        rows_data = json.loads(rows_path.read_text())
-        validated_rows = [ValidatedRow(**r) for r in rows_data]
+        validated_rows = [
+            _VALIDATED_ROW_ADAPTER.validate_json(line)
+            for line in rows_path.read_bytes().splitlines()
+            if line
+        ]
 
     # --- filter to publishable rows only ---
     publishable = [r for r in validated_rows if r.is_publishable]
     logger.info("clean: %d publishable rows (of %d total)", len(publishable), len(validated_rows))
 
     # --- deduplicate input rows (before pivot) ---
-    input_dicts = [r.model_dump() for r in publishable]
-    deduped_input = _dedupe(input_dicts, ("state_code", "month_canonical", "unemployment_rate", "unemployment_rate_prev_month"))
-    rows_deduped_input = len(publishable) - len(deduped_input)
+    deduped_validated = _dedupe(
+        publishable,
+        key_fn=lambda r: (r.state_code, r.month_canonical, r.unemployment_rate, r.unemployment_rate_prev_month),
+    )
+    rows_deduped_input = len(publishable) - len(deduped_validated)
     if rows_deduped_input:
         logger.info("clean: deduped %d input rows before pivot", rows_deduped_input)
-    deduped_validated = [ValidatedRow(**d) for d in deduped_input]
-
-    # --- pivot to long format with last-write-wins on (state_code, date) ---
-    # Sort by month ascending so that later months' prev_month values (which are
-    # data revisions) correctly override earlier months' current values.
-    # Example: if Nov's rate is 27.0 (typo) but Dec's prev_month says Nov was 5.3,
-    # the Dec-sourced value wins because Dec is processed after Nov.
-    sorted_validated = sorted(deduped_validated, key=lambda r: r.month_canonical)
-    pivoted_lookup: dict[tuple[str, str], CleanRow] = {}
+
+    # --- pivot to long format with later-month-wins on (state_code, date) ---
+    # Later months' prev_month values (which are data revisions) override
+    # earlier months' current values. Example: if Nov's rate is 27.0 (typo)
+    # but Dec's prev_month says Nov was 5.3, the Dec-sourced value wins.
+    # Precedence is resolved per key by comparing source months directly,
+    # which avoids sorting the whole input first.
+    pivoted_lookup: dict[tuple[str, str], tuple[str, CleanRow]] = {}
     revisions = 0
-    for row in sorted_validated:
+    for row in deduped_validated:
+        month_key = row.month_canonical
         for clean_row in _pivot_row(row, ingest_run_ts):
             key = (clean_row.state_code, clean_row.date)
-            if key in pivoted_lookup and pivoted_lookup[key].value != clean_row.value:
+            existing = pivoted_lookup.get(key)
+            if existing is None:
+                pivoted_lookup[key] = (month_key, clean_row)
+                continue
+            existing_month, existing_row = existing
+            # Ties on source month keep the later input row, matching the
+            # previous stable-sort last-write-wins behaviour.
+            wins = month_key >= existing_month
+            if existing_row.value != clean_row.value:
+                winner, loser = (clean_row, existing_row) if wins else (existing_row, clean_row)
                 logger.info(
                     "clean: revision for %s %s: %.1f → %.1f (source row %d)",
-                    key[0], key[1], pivoted_lookup[key].value, clean_row.value, clean_row.source_row_index,
+                    key[0], key[1], loser.value, winner.value, winner.source_row_index,
                 )
                 revisions += 1
-            pivoted_lookup[key] = clean_row
-    final_rows = list(pivoted_lookup.values())
+            if wins:
+                pivoted_lookup[key] = (month_key, clean_row)
+    final_rows = [entry[1] for entry in pivoted_lookup.values()]
     logger.info("clean: pivot produced %d unique state-month rows (%d revisions applied)", len(final_rows), revisions)
 
     # --- append to versioned JSONL ---
+    # One pass over final_rows: serialize into a single in-memory buffer and
+    # accumulate the manifest stats (date range, states covered) as we go.
     Path(clean_data_dir).mkdir(parents=True, exist_ok=True)
     jsonl_path = Path(clean_data_dir) / "clean_data.jsonl"
-    with jsonl_path.open("a") as fh:
-        for row in final_rows:
-            fh.write(row.model_dump_json() + "\n")
+    buf = bytearray()
+    min_date: str | None = None
+    max_date: str | None = None
+    states_covered: set[str] = set()
+    for row in final_rows:
+        states_covered.add(row.state_code)
+        date = row.date
+        if min_date is None or date < min_date:
+            min_date = date
+        if max_date is None or date > max_date:
+            max_date = date
+        buf += _CLEAN_ROW_ADAPTER.dump_json(row)
+        buf += b"\n"
+    with jsonl_path.open("ab") as fh:
+        fh.write(buf)
     logger.info("clean: appended %d rows to %s", len(final_rows), jsonl_path)
 
     # --- write clean_output manifest ---
-    dates = [r.date for r in final_rows]
     Path(pipeline_state_dir).mkdir(parents=True, exist_ok=True)
     manifest = {
         "run_id": run_id,
-        "produced_at": datetime.now().isoformat(),
+        "produced_at": ingest_run_ts,
         "rows_appended": len(final_rows),
         "rows_deduped_input": rows_deduped_input,
         "revisions_applied": revisions,
-        "date_range": {"min": min(dates) if dates else None, "max": max(dates) if dates else None},
-        "states_covered": sorted(set(r.state_code for r in final_rows)),
+        "date_range": {"min": min_date, "max": max_date},
+        "states_covered": sorted(states_covered),
     }
-    (Path(pipeline_state_dir) / "clean_output.json").write_text(json.dumps(manifest, indent=2))
+    (Path(pipeline_state_dir) / "clean_output.json").write_text(json.dumps(manifest))
     logger.info("clean: wrote clean_output.json")
 
     return final_rows
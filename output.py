@@ -7,11 +7,17 @@ Module:     from output import run_output
 from __future__ import annotations
 
 import csv
+import functools
+import io
 import json
 import logging
+import mmap
+import re
 import sys
-from collections import defaultdict
+from collections import Counter, defaultdict
 from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 
 import states as states_module
@@ -22,18 +28,16 @@ logger = logging.getLogger(__name__)
 # AP Style date formatting
 # ---------------------------------------------------------------------------
 
-_MONTH_ABBREVS: dict[int, str] = {
-    1: "Jan.", 2: "Feb.", 3: "March", 4: "April",
-    5: "May", 6: "June", 7: "July", 8: "Aug.",
-    9: "Sept.", 10: "Oct.", 11: "Nov.", 12: "Dec.",
-}
+# Indexed by month number; March–July are spelled out per AP Style.
+_AP_MONTH = ("", "Jan.", "Feb.", "March", "April", "May", "June",
+             "July", "Aug.", "Sept.", "Oct.", "Nov.", "Dec.")
 
 
+@functools.lru_cache(maxsize=4096)
 def _format_ap_date(date_str: str) -> str:
-    """'2025-12-01' → 'Dec. 2025'."""
-    # Keeping "day" in case it should be added later
-    year, month, day = map(int, date_str.split("-"))
-    return f"{_MONTH_ABBREVS[month]} {year}"
+    """'2025-12-01' → 'Dec. 1, 2025'."""
+    # Dates are always the 10-char ISO form — slice instead of strptime.
+    return f"{_AP_MONTH[int(date_str[5:7])]} {int(date_str[8:10])}, {date_str[0:4]}"
 
 
 # ---------------------------------------------------------------------------
@@ -41,17 +45,16 @@ def _format_ap_date(date_str: str) -> str:
 # ---------------------------------------------------------------------------
 
 
+# Suffix per value of n % 100 — covers the teens exception without branching.
+_ORDINAL_SUFFIX = tuple(
+    "th" if 11 <= i <= 13 else {1: "st", 2: "nd", 3: "rd"}.get(i % 10, "th")
+    for i in range(100)
+)
+
+
 def ordinal(n: int) -> str:
     """1 → '1st', 2 → '2nd', 3 → '3rd', 11 → '11th', 21 → '21st', etc."""
-    if 11 <= n % 100 <= 13:
-        return f"{n}th"
-    if n % 10 == 1:
-        return f"{n}st"
-    if n % 10 == 2:
-        return f"{n}nd"
-    if n % 10 == 3:
-        return f"{n}rd"
-    return f"{n}th"
+    return f"{n}{_ORDINAL_SUFFIX[n % 100]}"
 
 
 # ---------------------------------------------------------------------------
@@ -59,23 +62,61 @@ def ordinal(n: int) -> str:
 # ---------------------------------------------------------------------------
 
 
+# Narrow field extractors for the clean_data JSONL schema — pass 1 of
+# _read_latest_clean_data only needs these three fields to pick winners, so
+# full JSON decoding is deferred to the (much smaller) set of winning lines.
+_STATE_CODE_FIELD = re.compile(rb'"state_code":\s?"([^"]+)"')
+_DATE_FIELD = re.compile(rb'"date":\s?"([^"]+)"')
+_INGEST_RUN_FIELD = re.compile(rb'"ingest_run":\s?"([^"]+)"')
+
+
 def _read_latest_clean_data(path: str = "clean_data/clean_data.jsonl") -> list[dict]:
-    """Read JSONL, keep only the latest version per (state_code, date)."""
+    """Read JSONL, keep only the latest version per (state_code, date).
+
+    Two passes: the first scans for the winning (highest ingest_run) line per
+    key using cheap field extraction; the second decodes only those lines.
+    Superseded rows from earlier runs are never fully parsed.
+    """
     fpath = Path(path)
     if not fpath.exists():
         raise FileNotFoundError(f"clean_data not found: {fpath}")
 
-    by_key: dict[tuple[str, str], dict] = {}
-    with fpath.open() as fh:
-        for line in fh:
-            line = line.strip()
-            if not line:
-                continue
-            row = json.loads(line)
-            key = (row["state_code"], row["date"])
-            if key not in by_key or row["ingest_run"] > by_key[key]["ingest_run"]:
-                by_key[key] = row
-    return list(by_key.values())
+    # Memory-map the file so both passes read straight from the page cache
+    # without copying the whole JSONL into Python buffers.
+    winners: dict[tuple[bytes, bytes], tuple[bytes, int]] = {}
+    rows: list[dict] = []
+    with fpath.open("rb") as fh:
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # zero-length file — nothing to read
+            return rows
+        with mm:
+            # Pass 1 — find the latest ingest_run and byte offset per key.
+            offset = 0
+            for line in iter(mm.readline, b""):
+                line_len = len(line)
+                if line != b"\n":
+                    code_m = _STATE_CODE_FIELD.search(line)
+                    date_m = _DATE_FIELD.search(line)
+                    run_m = _INGEST_RUN_FIELD.search(line)
+                    if code_m and date_m and run_m:
+                        key = (code_m.group(1), date_m.group(1))
+                        ingest_run = run_m.group(1)
+                        prev = winners.get(key)
+                        if prev is None or ingest_run > prev[0]:
+                            winners[key] = (ingest_run, offset)
+                offset += line_len
+
+            # Pass 2 — decode only the winning lines. state_code and date
+            # are used as dict keys all over run_output; interning them makes
+            # those tuple-key hashes/compares hit identical string objects.
+            for _, line_offset in winners.values():
+                mm.seek(line_offset)
+                row = json.loads(mm.readline())
+                row["state_code"] = sys.intern(row["state_code"])
+                row["date"] = sys.intern(row["date"])
+                rows.append(row)
+    return rows
 
 
 def _load_qa_flags(pipeline_state_dir: str = ".pipeline_state") -> dict[tuple[str, str], list[str]]:
@@ -87,9 +128,11 @@ def _load_qa_flags(pipeline_state_dir: str = ".pipeline_state") -> dict[tuple[st
     rows_path = Path(manifest["rows_file"])
     if not rows_path.exists():
         return {}
-    rows = json.loads(rows_path.read_text())
     result: dict[tuple[str, str], list[str]] = {}
-    for row in rows:
+    for line in rows_path.read_bytes().splitlines():
+        if not line:
+            continue
+        row = json.loads(line)
         key = (row["state_code"], row["month_canonical"])
         if key in result:
             result[key].extend(row["qa_flags"])
@@ -103,6 +146,7 @@ def _load_qa_flags(pipeline_state_dir: str = ".pipeline_state") -> dict[tuple[st
 # ---------------------------------------------------------------------------
 
 
+@functools.lru_cache(maxsize=4096)
 def _prev_month_date(date_str: str) -> str:
     """'2025-12-01' → '2025-11-01'. Handles January wrap."""
     year, month, _ = map(int, date_str.split("-"))
@@ -123,16 +167,15 @@ def _competition_ranks(items: list[tuple[str, float]], reverse: bool = True) ->
 
     reverse=True → rank 1 = highest value.
     """
-    sorted_items = sorted(items, key=lambda x: x[1], reverse=reverse)
+    sorted_items = sorted(items, key=itemgetter(1), reverse=reverse)
     ranks: dict[str, int] = {}
-    i = 0
-    while i < len(sorted_items):
-        j = i
-        while j < len(sorted_items) and sorted_items[j][1] == sorted_items[i][1]:
-            j += 1
-        for k in range(i, j):
-            ranks[sorted_items[k][0]] = i + 1
-        i = j
+    rank = 0
+    prev_value: float | None = None
+    for i, (key, value) in enumerate(sorted_items):
+        if value != prev_value:
+            rank = i + 1
+            prev_value = value
+        ranks[key] = rank
     return ranks
 
 
@@ -144,13 +187,15 @@ def _scoped_ranks(state_values: dict[str, float]) -> dict[str, dict[str, int]]:
     """
     national = _competition_ranks(list(state_values.items()))
 
+    # Bucket through the flat code→geography maps — no record lookup per key.
     reg_groups: dict[str, list[tuple[str, float]]] = defaultdict(list)
     div_groups: dict[str, list[tuple[str, float]]] = defaultdict(list)
     for code, val in state_values.items():
-        ref = states_module.get_state_by_code(code)
-        if ref and ref["census_region"] and ref["census_division"]:
-            reg_groups[ref["census_region"]].append((code, val))
-            div_groups[ref["census_division"]].append((code, val))
+        region = states_module.USPS_TO_REGION.get(code)
+        division = states_module.USPS_TO_DIVISION.get(code)
+        if region and division:
+            reg_groups[region].append((code, val))
+            div_groups[division].append((code, val))
 
     regional: dict[str, int] = {}
     for group in reg_groups.values():
@@ -175,6 +220,29 @@ def _scoped_ranks(state_values: dict[str, float]) -> dict[str, dict[str, int]]:
 # ---------------------------------------------------------------------------
 
 
+# One sentence template per trend, applied with a single C-level .format
+# call instead of branch-and-f-string assembly. The None key covers rows
+# with no MoM data.
+_SUMMARY_TEMPLATES: dict[str | None, str] = {
+    "up": (
+        "{state}'s unemployment rate was {rate:.1f} percent in {date}, "
+        "up {change:.1f} percentage points from the prior month."
+    ),
+    "down": (
+        "{state}'s unemployment rate was {rate:.1f} percent in {date}, "
+        "down {change:.1f} percentage points from the prior month."
+    ),
+    "flat": (
+        "{state}'s unemployment rate was {rate:.1f} percent in {date}, "
+        "unchanged from the prior month."
+    ),
+    None: (
+        "{state}'s unemployment rate was {rate:.1f} percent in {date}. "
+        "Month-over-month change data is not available."
+    ),
+}
+
+
 def _render_summary(
     state_name: str,
     rate: float,
@@ -182,25 +250,13 @@ def _render_summary(
     mom_change: float | None,
     trend: str | None,
 ) -> str:
-    ap_date = _format_ap_date(date_str)
-    rate_str = f"{rate:.1f}"
-
-    if mom_change is None or trend is None:
-        return (
-            f"{state_name}'s unemployment rate was {rate_str} percent in {ap_date}. "
-            f"Month-over-month change data is not available."
-        )
-    if trend == "flat":
-        return (
-            f"{state_name}'s unemployment rate was {rate_str} percent in {ap_date}, "
-            f"unchanged from the prior month."
-        )
-
-    direction = "up" if trend == "up" else "down"
-    change_str = f"{abs(mom_change):.1f}"
-    return (
-        f"{state_name}'s unemployment rate was {rate_str} percent in {ap_date}, "
-        f"{direction} {change_str} percentage points from the prior month."
+    if mom_change is None:
+        trend = None
+    return _SUMMARY_TEMPLATES[trend].format(
+        state=state_name,
+        rate=rate,
+        date=_format_ap_date(date_str),
+        change=abs(mom_change) if mom_change is not None else 0.0,
     )
 
 
@@ -210,12 +266,12 @@ def _render_ranking_paragraph(
     descriptor: str,
     state_code: str,
     rank_data: dict[str, dict[str, int]],
-    state_ref: dict,
+    state_ref: states_module.StateRec,
     scope_counts: dict[str, dict[str, int]],
 ) -> str | None:
     """Render a ranking paragraph (rate or MoM).  Returns None if not renderable."""
-    region = state_ref.get("census_region", "")
-    division = state_ref.get("census_division", "")
+    region = state_ref.census_region
+    division = state_ref.census_division
     if not region or not division:
         return None
     if state_code not in rank_data:
@@ -241,11 +297,14 @@ def _render_ranking_paragraph(
 
 
 def _write_csv(filepath: str, rows: list[dict], fieldnames: list[str]) -> None:
+    # csv.writer over pre-ordered lists avoids DictWriter's per-row field
+    # lookup, and the StringIO buffer collapses the output to one write.
     Path(filepath).parent.mkdir(parents=True, exist_ok=True)
-    with open(filepath, "w", newline="") as fh:
-        writer = csv.DictWriter(fh, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    buf = io.StringIO(newline="")
+    writer = csv.writer(buf)
+    writer.writerow(fieldnames)
+    writer.writerows([row.get(f, "") for f in fieldnames] for row in rows)
+    Path(filepath).write_bytes(buf.getvalue().encode())
     logger.info("output: wrote %s (%d rows)", filepath, len(rows))
 
 
@@ -265,8 +324,15 @@ def run_output(
     latest_data_month: str | None = None,
     pipeline_state_dir: str = ".pipeline_state",
     clean_data_path: str = "clean_data/clean_data.jsonl",
+    qa_flags_map: dict[tuple[str, str], list[str]] | None = None,
 ) -> None:
-    """Compute MoM, rankings, render templates, and write all output files."""
+    """Compute MoM, rankings, render templates, and write all output files.
+
+    Args:
+        qa_flags_map: {(state_code, month_canonical): [flags]} built by the
+            caller (main.py passes it from the in-process validated rows).
+            If None, falls back to re-reading the validated rows file.
+    """
     # --- resolve run_id / latest_data_month ---
     if run_id is None or latest_data_month is None:
         manifest_path = Path(pipeline_state_dir) / "run_manifest.json"
@@ -274,13 +340,15 @@ def run_output(
             manifest = json.loads(manifest_path.read_text())
             run_id = run_id or manifest.get("run_id")
             latest_data_month = latest_data_month or manifest.get("latest_data_month")
+    now = datetime.now()
     if run_id is None:
-        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_id = now.strftime("%Y%m%d_%H%M%S")
 
     # --- load ---
     clean_rows = _read_latest_clean_data(clean_data_path)
     logger.info("output: %d latest-version rows loaded", len(clean_rows))
-    qa_flags_map = _load_qa_flags(pipeline_state_dir)
+    if qa_flags_map is None:
+        qa_flags_map = _load_qa_flags(pipeline_state_dir)
 
     # --- value lookup: (state_code, date) → rate ---
     value_lookup: dict[tuple[str, str], float] = {
@@ -292,24 +360,38 @@ def run_output(
         latest_data_month = max(r["date"][:7] for r in clean_rows)
     latest_date = f"{latest_data_month}-01"
 
-    # --- all (state_code, date) pairs grouped by state ---
-    state_months: dict[str, list[str]] = defaultdict(list)
-    for r in clean_rows:
-        state_months[r["state_code"]].append(r["date"])
-
     # --- MoM for every (state, date) pair ---
+    # Encode each date as a months-since-epoch integer so consecutive months
+    # differ by exactly 1, sort by (state, month index), and compare adjacent
+    # entries — one pass, no per-month dict probing.
+    indexed = [
+        (r["state_code"], int(r["date"][:4]) * 12 + int(r["date"][5:7]), r["date"], r["value"])
+        for r in clean_rows
+    ]
+    indexed.sort()
+
+    # --- all (state_code, date) pairs grouped by state ---
+    # indexed is already sorted by state, so grouping is one groupby scan
+    # rather than a defaultdict append per row.
+    state_months: dict[str, list[str]] = {
+        code: [entry[2] for entry in group]
+        for code, group in groupby(indexed, key=itemgetter(0))
+    }
     mom_data: dict[tuple[str, str], tuple[float | None, str | None]] = {}
-    for code, dates in state_months.items():
-        for date in dates:
-            prev = _prev_month_date(date)
-            curr_val = value_lookup.get((code, date))
-            prev_val = value_lookup.get((code, prev))
-            if curr_val is not None and prev_val is not None:
-                change = round(curr_val - prev_val, 1)
-                trend: str | None = "up" if change > 0 else ("down" if change < 0 else "flat")
-                mom_data[(code, date)] = (change, trend)
-            else:
-                mom_data[(code, date)] = (None, None)
+    prev_code: str | None = None
+    prev_idx = 0
+    prev_val = 0.0
+    for code, month_idx, date, val in indexed:
+        if code == prev_code and month_idx - prev_idx == 1:
+            change = round(val - prev_val, 1)
+            trend: str | None = "up" if change > 0 else ("down" if change < 0 else "flat")
+            mom_data[(code, date)] = (change, trend)
+        else:
+            mom_data[(code, date)] = (None, None)
+        prev_code, prev_idx, prev_val = code, month_idx, val
+
+    # --- resolve state references once, up front ---
+    refs = {code: states_module.get_state_by_code(code) for code in state_months}
 
     # --- states present in the latest month ---
     latest_states: dict[str, float] = {}
@@ -329,24 +411,27 @@ def run_output(
     mom_ranks = _scoped_ranks(mom_abs_values)
 
     # scope counts — how many states actually have data per region/division
-    scope_counts: dict[str, dict[str, int]] = {"regional": {}, "divisional": {}}
-    for code in latest_states:
-        ref = states_module.get_state_by_code(code)
-        if ref and ref["census_region"] and ref["census_division"]:
-            scope_counts["regional"][ref["census_region"]] = scope_counts["regional"].get(ref["census_region"], 0) + 1
-            scope_counts["divisional"][ref["census_division"]] = scope_counts["divisional"].get(ref["census_division"], 0) + 1
+    scoped_refs = [
+        refs[code] for code in latest_states
+        if refs[code] and refs[code].census_region and refs[code].census_division
+    ]
+    scope_counts: dict[str, dict[str, int]] = {
+        "regional": dict(Counter(ref.census_region for ref in scoped_refs)),
+        "divisional": dict(Counter(ref.census_division for ref in scoped_refs)),
+    }
 
     # ---------------------------------------------------------------------------
     # Build output records
     # ---------------------------------------------------------------------------
 
     # --- wordsmith JSON (latest month, one entry per state) ---
+    updated_at = now.isoformat()
     wordsmith_entries: list[dict] = []
     for code in sorted(latest_states.keys()):
-        ref = states_module.get_state_by_code(code)
+        ref = refs.get(code)
         if ref is None:
             continue
-        name = ref["name"]
+        name = ref.name
         rate = latest_states[code]
         change, trend_val = mom_data.get((code, latest_date), (None, None))
 
@@ -375,57 +460,54 @@ def run_output(
             "paragraph_2": para2,
             "paragraph_3": para3,
             "qa_flags": flags,
-            "updated_at": datetime.now().isoformat(),
+            "updated_at": updated_at,
         })
 
-    # --- map CSV (latest month only) ---
+    # --- map + table CSVs (latest month only, built in one pass) ---
     map_rows: list[dict] = []
+    table_rows: list[dict] = []
     for code in sorted(latest_states.keys()):
-        ref = states_module.get_state_by_code(code)
+        ref = refs.get(code)
         if ref is None:
             continue
         rate = latest_states[code]
+        rate_str = f"{rate:.1f}"
         change, trend_val = mom_data.get((code, latest_date), (None, None))
+        change_str = f"{change:.1f}" if change is not None else ""
         map_rows.append({
             "date": latest_date,
             "state_code": code,
-            "state_name": ref["name"],
-            "fips_code": ref["fips_code"],
-            "unemployment_rate": f"{rate:.1f}",
-            "mom_change_pp": f"{change:.1f}" if change is not None else "",
+            "state_name": ref.name,
+            "fips_code": ref.fips_code,
+            "unemployment_rate": rate_str,
+            "mom_change_pp": change_str,
             "trend_direction": trend_val or "",
             "rate_rank_national": rate_ranks.get(code, {}).get("national", ""),
-            "census_region": ref["census_region"],
-            "census_division": ref["census_division"],
+            "census_region": ref.census_region,
+            "census_division": ref.census_division,
             "update_dttm": run_id,
         })
-
-    # --- table CSV (latest month, sorted by national rate rank) ---
-    table_rows: list[dict] = []
-    for code in sorted(latest_states.keys(), key=lambda c: rate_ranks.get(c, {}).get("national", 999)):
-        ref = states_module.get_state_by_code(code)
-        if ref is None:
-            continue
-        rate = latest_states[code]
-        change, trend_val = mom_data.get((code, latest_date), (None, None))
         # rr = rate_ranks.get(code, {})
         # mr = mom_ranks.get(code, {})
         table_rows.append({
             # "rank_national": rr.get("national", ""),
             "date": latest_date,
-            "State": ref["name"],
+            "State": ref.name,
             "state_code": code,
-            "Unemployment Rate": f"{rate:.1f}",
-            "Monthly Change": f"{change:.1f}" if change is not None else "",
+            "Unemployment Rate": rate_str,
+            "Monthly Change": change_str,
             # "trend_direction": trend_val or "",
             # "rate_rank_region": rr.get("regional", ""),
             # "rate_rank_division": rr.get("divisional", ""),
             # "mom_rank_national": mr.get("national", ""),
-            "Region": ref["census_region"],
-            "Division": ref["census_division"],
+            "Region": ref.census_region,
+            "Division": ref.census_division,
             "update_dttm": run_id,
         })
 
+    # table CSV is sorted by national rate rank
+    table_rows.sort(key=lambda r: rate_ranks.get(r["state_code"], {}).get("national", 999))
+
     # ---------------------------------------------------------------------------
     # Write all output files
     # ---------------------------------------------------------------------------
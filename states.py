@@ -5,12 +5,16 @@ source values before running the pipeline. The values below are pre-filled from
 U.S. Census Bureau definitions — verify against your source if required.
 """
 
-from collections import Counter
+import functools
+import sys
+import types
+from collections import defaultdict
+from dataclasses import dataclass
 
 # ---------------------------------------------------------------------------
 # State reference data
 # ---------------------------------------------------------------------------
-# Fields:
+# Columns (one row per state):
 #   name            – canonical full name (title case)
 #   usps_code       – 2-letter USPS postal code
 #   fips_code       – 2-digit zero-padded FIPS state code
@@ -24,80 +28,164 @@ from collections import Counter
 #   West        → Mountain, Pacific
 # ---------------------------------------------------------------------------
 
-STATES: list[dict] = [
-    {"name": "Alabama",        "usps_code": "AL", "fips_code": "01", "census_region": "South",     "census_division": "East South Central"},
-    {"name": "Alaska",         "usps_code": "AK", "fips_code": "02", "census_region": "West",      "census_division": "Pacific"},
-    {"name": "Arizona",        "usps_code": "AZ", "fips_code": "04", "census_region": "West",      "census_division": "Mountain"},
-    {"name": "Arkansas",       "usps_code": "AR", "fips_code": "05", "census_region": "South",     "census_division": "West South Central"},
-    {"name": "California",     "usps_code": "CA", "fips_code": "06", "census_region": "West",      "census_division": "Pacific"},
-    {"name": "Colorado",       "usps_code": "CO", "fips_code": "08", "census_region": "West",      "census_division": "Mountain"},
-    {"name": "Connecticut",    "usps_code": "CT", "fips_code": "09", "census_region": "Northeast", "census_division": "New England"},
-    {"name": "Delaware",       "usps_code": "DE", "fips_code": "10", "census_region": "South",     "census_division": "South Atlantic"},
-    {"name": "Florida",        "usps_code": "FL", "fips_code": "12", "census_region": "South",     "census_division": "South Atlantic"},
-    {"name": "Georgia",        "usps_code": "GA", "fips_code": "13", "census_region": "South",     "census_division": "South Atlantic"},
-    {"name": "Hawaii",         "usps_code": "HI", "fips_code": "15", "census_region": "West",      "census_division": "Pacific"},
-    {"name": "Idaho",          "usps_code": "ID", "fips_code": "16", "census_region": "West",      "census_division": "Mountain"},
-    {"name": "Illinois",       "usps_code": "IL", "fips_code": "17", "census_region": "Midwest",   "census_division": "East North Central"},
-    {"name": "Indiana",        "usps_code": "IN", "fips_code": "18", "census_region": "Midwest",   "census_division": "East North Central"},
-    {"name": "Iowa",           "usps_code": "IA", "fips_code": "19", "census_region": "Midwest",   "census_division": "West North Central"},
-    {"name": "Kansas",         "usps_code": "KS", "fips_code": "20", "census_region": "Midwest",   "census_division": "West North Central"},
-    {"name": "Kentucky",       "usps_code": "KY", "fips_code": "21", "census_region": "South",     "census_division": "East South Central"},
-    {"name": "Louisiana",      "usps_code": "LA", "fips_code": "22", "census_region": "South",     "census_division": "West South Central"},
-    {"name": "Maine",          "usps_code": "ME", "fips_code": "23", "census_region": "Northeast", "census_division": "New England"},
-    {"name": "Maryland",       "usps_code": "MD", "fips_code": "24", "census_region": "South",     "census_division": "South Atlantic"},
-    {"name": "Massachusetts",  "usps_code": "MA", "fips_code": "25", "census_region": "Northeast", "census_division": "New England"},
-    {"name": "Michigan",       "usps_code": "MI", "fips_code": "26", "census_region": "Midwest",   "census_division": "East North Central"},
-    {"name": "Minnesota",      "usps_code": "MN", "fips_code": "27", "census_region": "Midwest",   "census_division": "West North Central"},
-    {"name": "Mississippi",    "usps_code": "MS", "fips_code": "28", "census_region": "South",     "census_division": "East South Central"},
-    {"name": "Missouri",       "usps_code": "MO", "fips_code": "29", "census_region": "Midwest",   "census_division": "West North Central"},
-    {"name": "Montana",        "usps_code": "MT", "fips_code": "30", "census_region": "West",      "census_division": "Mountain"},
-    {"name": "Nebraska",       "usps_code": "NE", "fips_code": "31", "census_region": "Midwest",   "census_division": "West North Central"},
-    {"name": "Nevada",         "usps_code": "NV", "fips_code": "32", "census_region": "West",      "census_division": "Mountain"},
-    {"name": "New Hampshire",  "usps_code": "NH", "fips_code": "33", "census_region": "Northeast", "census_division": "New England"},
-    {"name": "New Jersey",     "usps_code": "NJ", "fips_code": "34", "census_region": "Northeast", "census_division": "Middle Atlantic"},
-    {"name": "New Mexico",     "usps_code": "NM", "fips_code": "35", "census_region": "West",      "census_division": "Mountain"},
-    {"name": "New York",       "usps_code": "NY", "fips_code": "36", "census_region": "Northeast", "census_division": "Middle Atlantic"},
-    {"name": "North Carolina", "usps_code": "NC", "fips_code": "37", "census_region": "South",     "census_division": "South Atlantic"},
-    {"name": "North Dakota",   "usps_code": "ND", "fips_code": "38", "census_region": "Midwest",   "census_division": "West North Central"},
-    {"name": "Ohio",           "usps_code": "OH", "fips_code": "39", "census_region": "Midwest",   "census_division": "East North Central"},
-    {"name": "Oklahoma",       "usps_code": "OK", "fips_code": "40", "census_region": "South",     "census_division": "West South Central"},
-    {"name": "Oregon",         "usps_code": "OR", "fips_code": "41", "census_region": "West",      "census_division": "Pacific"},
-    {"name": "Pennsylvania",   "usps_code": "PA", "fips_code": "42", "census_region": "Northeast", "census_division": "Middle Atlantic"},
-    {"name": "Rhode Island",   "usps_code": "RI", "fips_code": "44", "census_region": "Northeast", "census_division": "New England"},
-    {"name": "South Carolina", "usps_code": "SC", "fips_code": "45", "census_region": "South",     "census_division": "South Atlantic"},
-    {"name": "South Dakota",   "usps_code": "SD", "fips_code": "46", "census_region": "Midwest",   "census_division": "West North Central"},
-    {"name": "Tennessee",      "usps_code": "TN", "fips_code": "47", "census_region": "South",     "census_division": "East South Central"},
-    {"name": "Texas",          "usps_code": "TX", "fips_code": "48", "census_region": "South",     "census_division": "West South Central"},
-    {"name": "Utah",           "usps_code": "UT", "fips_code": "49", "census_region": "West",      "census_division": "Mountain"},
-    {"name": "Vermont",        "usps_code": "VT", "fips_code": "50", "census_region": "Northeast", "census_division": "New England"},
-    {"name": "Virginia",       "usps_code": "VA", "fips_code": "51", "census_region": "South",     "census_division": "South Atlantic"},
-    {"name": "Washington",     "usps_code": "WA", "fips_code": "53", "census_region": "West",      "census_division": "Pacific"},
-    {"name": "West Virginia",  "usps_code": "WV", "fips_code": "54", "census_region": "South",     "census_division": "South Atlantic"},
-    {"name": "Wisconsin",      "usps_code": "WI", "fips_code": "55", "census_region": "Midwest",   "census_division": "East North Central"},
-    {"name": "Wyoming",        "usps_code": "WY", "fips_code": "56", "census_region": "West",      "census_division": "Mountain"},
-]
+@dataclass(frozen=True, slots=True)
+class StateRec:
+    """One immutable state reference record."""
+    name: str
+    usps_code: str
+    fips_code: str
+    census_region: str
+    census_division: str
+
+
+_STATE_TABLE: tuple[tuple[str, str, str, str, str], ...] = (
+    ("Alabama",       "AL", "01", "South",     "East South Central"),
+    ("Alaska",        "AK", "02", "West",      "Pacific"),
+    ("Arizona",       "AZ", "04", "West",      "Mountain"),
+    ("Arkansas",      "AR", "05", "South",     "West South Central"),
+    ("California",    "CA", "06", "West",      "Pacific"),
+    ("Colorado",      "CO", "08", "West",      "Mountain"),
+    ("Connecticut",   "CT", "09", "Northeast", "New England"),
+    ("Delaware",      "DE", "10", "South",     "South Atlantic"),
+    ("Florida",       "FL", "12", "South",     "South Atlantic"),
+    ("Georgia",       "GA", "13", "South",     "South Atlantic"),
+    ("Hawaii",        "HI", "15", "West",      "Pacific"),
+    ("Idaho",         "ID", "16", "West",      "Mountain"),
+    ("Illinois",      "IL", "17", "Midwest",   "East North Central"),
+    ("Indiana",       "IN", "18", "Midwest",   "East North Central"),
+    ("Iowa",          "IA", "19", "Midwest",   "West North Central"),
+    ("Kansas",        "KS", "20", "Midwest",   "West North Central"),
+    ("Kentucky",      "KY", "21", "South",     "East South Central"),
+    ("Louisiana",     "LA", "22", "South",     "West South Central"),
+    ("Maine",         "ME", "23", "Northeast", "New England"),
+    ("Maryland",      "MD", "24", "South",     "South Atlantic"),
+    ("Massachusetts", "MA", "25", "Northeast", "New England"),
+    ("Michigan",      "MI", "26", "Midwest",   "East North Central"),
+    ("Minnesota",     "MN", "27", "Midwest",   "West North Central"),
+    ("Mississippi",   "MS", "28", "South",     "East South Central"),
+    ("Missouri",      "MO", "29", "Midwest",   "West North Central"),
+    ("Montana",       "MT", "30", "West",      "Mountain"),
+    ("Nebraska",      "NE", "31", "Midwest",   "West North Central"),
+    ("Nevada",        "NV", "32", "West",      "Mountain"),
+    ("New Hampshire", "NH", "33", "Northeast", "New England"),
+    ("New Jersey",    "NJ", "34", "Northeast", "Middle Atlantic"),
+    ("New Mexico",    "NM", "35", "West",      "Mountain"),
+    ("New York",      "NY", "36", "Northeast", "Middle Atlantic"),
+    ("North Carolina","NC", "37", "South",     "South Atlantic"),
+    ("North Dakota",  "ND", "38", "Midwest",   "West North Central"),
+    ("Ohio",          "OH", "39", "Midwest",   "East North Central"),
+    ("Oklahoma",      "OK", "40", "South",     "West South Central"),
+    ("Oregon",        "OR", "41", "West",      "Pacific"),
+    ("Pennsylvania",  "PA", "42", "Northeast", "Middle Atlantic"),
+    ("Rhode Island",  "RI", "44", "Northeast", "New England"),
+    ("South Carolina","SC", "45", "South",     "South Atlantic"),
+    ("South Dakota",  "SD", "46", "Midwest",   "West North Central"),
+    ("Tennessee",     "TN", "47", "South",     "East South Central"),
+    ("Texas",         "TX", "48", "South",     "West South Central"),
+    ("Utah",          "UT", "49", "West",      "Mountain"),
+    ("Vermont",       "VT", "50", "Northeast", "New England"),
+    ("Virginia",      "VA", "51", "South",     "South Atlantic"),
+    ("Washington",    "WA", "53", "West",      "Pacific"),
+    ("West Virginia", "WV", "54", "South",     "South Atlantic"),
+    ("Wisconsin",     "WI", "55", "Midwest",   "East North Central"),
+    ("Wyoming",       "WY", "56", "West",      "Mountain"),
+)
+
+# Structure-of-arrays view — one tuple per column, for scans that only touch
+# a single field (counts, grouping) without chasing 50 dict pointers.
+_NAMES, _USPS, _FIPS, _REGIONS, _DIVISIONS = (tuple(col) for col in zip(*_STATE_TABLE))
+
+# Row view, built once at import. Every field string is interned so that
+# repeated equality checks and dict-key hashing downstream (grouping by
+# region/division, keying on USPS codes) compare by identity.
+STATES: tuple[StateRec, ...] = tuple(
+    StateRec(*(sys.intern(field) for field in row)) for row in _STATE_TABLE
+)
 
 # ---------------------------------------------------------------------------
 # Lookup helpers
 # ---------------------------------------------------------------------------
 
-_BY_CODE: dict[str, dict] = {s["usps_code"].upper(): s for s in STATES}
-_BY_NAME: dict[str, dict] = {s["name"].lower(): s for s in STATES}
+# The lookup tables are built lazily on first use — importers that only need
+# the STATES constants skip the construction cost entirely. functools.cache
+# makes each a build-once read-only snapshot.
+
+
+@functools.cache
+def _code_table() -> tuple[StateRec | None, ...]:
+    """Direct-index code table: a USPS code is two ASCII letters, so
+    (letter1, letter2) maps into a dense 26×26 slot array. Lookup is two
+    ord() calls and an index — no string hashing or probe sequence.
+    """
+    slots: list[StateRec | None] = [None] * 676
+    for state in STATES:
+        slots[(ord(state.usps_code[0]) - 65) * 26 + (ord(state.usps_code[1]) - 65)] = state
+    return tuple(slots)
+
 
+@functools.cache
+def _by_name() -> types.MappingProxyType[str, StateRec]:
+    """Name lookup map, carrying both title-cased and lowercased key
+    spellings so canonical input hits without a per-call .lower() allocation.
+    """
+    return types.MappingProxyType(
+        {name.lower(): s for name, s in zip(_NAMES, STATES)} | dict(zip(_NAMES, STATES))
+    )
 
-def get_state_by_code(code: str) -> dict | None:
+
+def get_state_by_code(code: str) -> StateRec | None:
     """Look up a state by 2-letter USPS code (case-insensitive)."""
-    return _BY_CODE.get(code.upper())
+    if len(code) != 2:
+        return None
+    # The &0xDF mask upper-cases ASCII letters branch-free.
+    c0 = (ord(code[0]) & 0xDF) - 65
+    c1 = (ord(code[1]) & 0xDF) - 65
+    if 0 <= c0 < 26 and 0 <= c1 < 26:
+        return _code_table()[c0 * 26 + c1]
+    return None
 
 
-def get_state_by_name(name: str) -> dict | None:
+def get_state_by_name(name: str) -> StateRec | None:
     """Look up a state by canonical name (case-insensitive, exact match)."""
-    return _BY_NAME.get(name.lower())
+    by_name = _by_name()
+    state = by_name.get(name)
+    return state if state is not None else by_name.get(name.lower())
+
+
+# All-empty sentinel for failed lookups. Callers that would otherwise write
+# `rec = get_state_by_code(x); if rec is None: ...` can instead take
+# `get_state_by_code(x) or MISSING_STATE` and act on the empty fields
+# without a per-row branch.
+MISSING_STATE = StateRec("", "", "", "", "")
+
+
+def contains_code(code: str) -> bool:
+    """True if code resolves to a known state (case-insensitive)."""
+    return get_state_by_code(code) is not None
 
 
 # ---------------------------------------------------------------------------
 # Derived constants — computed once at import time
 # ---------------------------------------------------------------------------
 
-REGION_STATE_COUNTS: dict[str, int] = dict(Counter(s["census_region"] for s in STATES))
-DIVISION_STATE_COUNTS: dict[str, int] = dict(Counter(s["census_division"] for s in STATES))
+# Per-scope state counts and group indexes, tallied in one pass over STATES
+# rather than a separate iteration per constant.
+REGION_STATE_COUNTS: dict[str, int] = defaultdict(int)
+DIVISION_STATE_COUNTS: dict[str, int] = defaultdict(int)
+_by_region: dict[str, list[StateRec]] = defaultdict(list)
+_by_division: dict[str, list[StateRec]] = defaultdict(list)
+for _state in STATES:
+    REGION_STATE_COUNTS[_state.census_region] += 1
+    DIVISION_STATE_COUNTS[_state.census_division] += 1
+    _by_region[_state.census_region].append(_state)
+    _by_division[_state.census_division].append(_state)
+REGION_STATE_COUNTS = dict(REGION_STATE_COUNTS)
+DIVISION_STATE_COUNTS = dict(DIVISION_STATE_COUNTS)
+STATES_BY_REGION: dict[str, tuple[StateRec, ...]] = {k: tuple(v) for k, v in _by_region.items()}
+STATES_BY_DIVISION: dict[str, tuple[StateRec, ...]] = {k: tuple(v) for k, v in _by_division.items()}
+del _by_region, _by_division, _state
+
+# Flat code → geography maps, for bucketing per-state values without a full
+# record lookup per key.
+USPS_TO_REGION: dict[str, str] = dict(zip(_USPS, _REGIONS))
+USPS_TO_DIVISION: dict[str, str] = dict(zip(_USPS, _DIVISIONS))
@@ -6,18 +6,24 @@ from pathlib import Path
 
 import pytest
 
-# Ensure repo root is on sys.path so imports like `import states` work
-REPO_ROOT = Path(__file__).resolve().parent.parent
+# Ensure repo root is on sys.path so imports like `import states` work.
+# pytest imports conftest before collecting any test module, so this is the
+# one place the path tweak needs to live.
+REPO_ROOT = Path(__file__).parent.parent
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
 from validate import ValidatedRow  # noqa: E402
 
 
-@pytest.fixture
-def sample_validated_rows() -> list[ValidatedRow]:
-    """Four rows for two states across two months; clean and publishable."""
-    return [
+@pytest.fixture(scope="session")
+def sample_validated_rows() -> tuple[ValidatedRow, ...]:
+    """Four rows for two states across two months; clean and publishable.
+
+    Session-scoped and returned as a tuple: the rows are read-only test
+    data, so one construction is shared across the whole run.
+    """
+    return (
         ValidatedRow(
             state_canonical="Alabama", state_code="AL", month_canonical="2025-11",
             unemployment_rate=4.5, unemployment_rate_prev_month=4.6,
@@ -38,7 +44,7 @@ def sample_validated_rows() -> list[ValidatedRow]:
             unemployment_rate=5.8, unemployment_rate_prev_month=5.6,
             source="BLS", source_row_index=5, qa_flags=[], is_publishable=True,
         ),
-    ]
+    )
 
 
 @pytest.fixture
@@ -54,6 +60,6 @@ def tmp_pipeline(tmp_path: Path) -> dict[str, str]:
 
 
 def _write_jsonl(path: str, rows: list[dict]) -> None:
+    # Encode the whole batch and write it in one call.
     with open(path, "a") as fh:
-        for row in rows:
-            fh.write(json.dumps(row) + "\n")
+        fh.write("".join(json.dumps(row) + "\n" for row in rows))
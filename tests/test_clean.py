@@ -1,15 +1,12 @@
 """Tests for clean.py – pivot, revision override, dedup, January wrap."""
 
 import json
-import sys
 from pathlib import Path
 
 import pytest
 
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
-
-from clean import _pivot_row, _prev_month_date, run_clean  # noqa: E402
-from validate import CleanRow, ValidatedRow  # noqa: E402
+from clean import _pivot_row, _prev_month_date, run_clean
+from validate import CleanRow, ValidatedRow
 
 
 # ---------------------------------------------------------------------------
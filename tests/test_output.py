@@ -1,11 +1,6 @@
 """Tests for output.py – ordinal, AP dates, rankings, MoM, templates."""
 
-import sys
-from pathlib import Path
-
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
-
-from output import (  # noqa: E402
+from output import (
     _competition_ranks,
     _format_ap_date,
     _render_summary,
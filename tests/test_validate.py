@@ -1,13 +1,10 @@
 """Tests for validate.py – date normalization, state resolution, rate checks, gate."""
 
-import sys
-from pathlib import Path
+import functools
 
 import pytest
 
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
-
-from validate import (  # noqa: E402
+from validate import (
     ValidatedRow,
     _check_prev_month_imputed,
     _check_publish_gate,
@@ -17,26 +14,51 @@ from validate import (  # noqa: E402
 )
 
 
-# ---------------------------------------------------------------------------
-# Date normalization
-# ---------------------------------------------------------------------------
+# Shared input template for _validate_row call sites — built once; each test
+# overrides only the fields it cares about.
+BASE_ROW = {
+    "state": "Alabama", "state_code": "AL", "month": "2025-12",
+    "unemployment_rate": 4.5, "unemployment_rate_prev_month": 4.6, "source": "BLS",
+}
 
 
-class TestNormalizeDate:
-    def test_hyphen_format(self):
-        assert _normalize_date("2025-12") == "2025-12"
+def _row(**overrides) -> dict:
+    return {**BASE_ROW, **overrides}
 
-    def test_slash_format(self):
-        assert _normalize_date("2025/10") == "2025-10"
 
-    def test_with_whitespace(self):
-        assert _normalize_date("  2025-09  ") == "2025-09"
+@functools.lru_cache(maxsize=512)
+def _flag_name_set(flags: tuple[str, ...]) -> frozenset[str]:
+    """Flag-name prefixes — qa_flags entries are 'name' or 'name: detail'.
 
-    def test_unparseable(self):
-        assert _normalize_date("foobar") is None
+    Cached per distinct flag tuple, so repeated assertions against the same
+    row's flags skip the re-parse.
+    """
+    return frozenset(f.split(":", 1)[0].strip() for f in flags)
 
-    def test_partial_date(self):
-        assert _normalize_date("2025") is None
+
+def _flag_names(row) -> frozenset[str]:
+    return _flag_name_set(tuple(row.qa_flags))
+
+
+# ---------------------------------------------------------------------------
+# Date normalization
+# ---------------------------------------------------------------------------
+
+
+class TestNormalizeDate:
+    @pytest.mark.parametrize(
+        ("raw", "expected"),
+        [
+            ("2025-12", "2025-12"),
+            ("2025/10", "2025-10"),
+            ("  2025-09  ", "2025-09"),
+            ("foobar", None),
+            ("2025", None),
+        ],
+        ids=["hyphen", "slash", "whitespace", "unparseable", "partial"],
+    )
+    def test_normalize(self, raw, expected):
+        assert _normalize_date(raw) == expected
 
 
 # ---------------------------------------------------------------------------
@@ -46,40 +68,40 @@ class TestNormalizeDate:
 
 class TestStateResolution:
     def test_canonical_name_unchanged(self):
-        row = _validate_row({
-            "state": "California", "state_code": "CA", "month": "2025-12",
-            "unemployment_rate": 4.0, "unemployment_rate_prev_month": 4.1, "source": "BLS",
-        }, row_index=2)
+        row = _validate_row(_row(
+            state="California", state_code="CA",
+            unemployment_rate=4.0, unemployment_rate_prev_month=4.1,
+        ), row_index=2)
         assert row is not None
         assert row.state_canonical == "California"
         assert row.qa_flags == []
 
     def test_abbreviated_name_normalized(self):
-        row = _validate_row({
-            "state": "Calif.", "state_code": "CA", "month": "2025-12",
-            "unemployment_rate": 4.0, "unemployment_rate_prev_month": 4.1, "source": "BLS",
-        }, row_index=2)
+        row = _validate_row(_row(
+            state="Calif.", state_code="CA",
+            unemployment_rate=4.0, unemployment_rate_prev_month=4.1,
+        ), row_index=2)
         assert row is not None
         assert row.state_canonical == "California"
-        assert any("state_name_normalized" in f for f in row.qa_flags)
+        assert "state_name_normalized" in _flag_names(row)
 
     def test_code_as_name(self):
-        row = _validate_row({
-            "state": "TX", "state_code": "TX", "month": "2025-11",
-            "unemployment_rate": 5.0, "unemployment_rate_prev_month": 5.1, "source": "BLS",
-        }, row_index=2)
+        row = _validate_row(_row(
+            state="TX", state_code="TX", month="2025-11",
+            unemployment_rate=5.0, unemployment_rate_prev_month=5.1,
+        ), row_index=2)
         assert row is not None
         assert row.state_canonical == "Texas"
-        assert any("state_name_normalized" in f for f in row.qa_flags)
+        assert "state_name_normalized" in _flag_names(row)
 
     def test_unknown_state_code(self):
-        row = _validate_row({
-            "state": "Nowhere", "state_code": "XX", "month": "2025-12",
-            "unemployment_rate": 3.0, "unemployment_rate_prev_month": 3.1, "source": "BLS",
-        }, row_index=2)
+        row = _validate_row(_row(
+            state="Nowhere", state_code="XX",
+            unemployment_rate=3.0, unemployment_rate_prev_month=3.1,
+        ), row_index=2)
         assert row is not None
         assert row.is_publishable is False
-        assert any("unknown_state_code" in f for f in row.qa_flags)
+        assert "unknown_state_code" in _flag_names(row)
 
 
 # ---------------------------------------------------------------------------
@@ -89,57 +111,53 @@ class TestStateResolution:
 
 class TestRatePlausibility:
     def test_negative_rate_blocked(self):
-        row = _validate_row({
-            "state": "Colorado", "state_code": "CO", "month": "2025-10",
-            "unemployment_rate": -1.2, "unemployment_rate_prev_month": 3.0, "source": "BLS",
-        }, row_index=2)
+        row = _validate_row(_row(
+            state="Colorado", state_code="CO", month="2025-10",
+            unemployment_rate=-1.2, unemployment_rate_prev_month=3.0,
+        ), row_index=2)
         assert row is not None
         assert row.is_publishable is False
-        assert any("implausible_rate" in f for f in row.qa_flags)
+        assert "implausible_rate" in _flag_names(row)
 
     def test_rate_at_100_blocked(self):
-        row = _validate_row({
-            "state": "Colorado", "state_code": "CO", "month": "2025-10",
-            "unemployment_rate": 100.0, "unemployment_rate_prev_month": 3.0, "source": "BLS",
-        }, row_index=2)
+        row = _validate_row(_row(
+            state="Colorado", state_code="CO", month="2025-10",
+            unemployment_rate=100.0, unemployment_rate_prev_month=3.0,
+        ), row_index=2)
         assert row is not None
         assert row.is_publishable is False
 
     def test_rate_just_below_100_publishable(self):
-        row = _validate_row({
-            "state": "Colorado", "state_code": "CO", "month": "2025-10",
-            "unemployment_rate": 99.9, "unemployment_rate_prev_month": 3.0, "source": "BLS",
-        }, row_index=2)
+        row = _validate_row(_row(
+            state="Colorado", state_code="CO", month="2025-10",
+            unemployment_rate=99.9, unemployment_rate_prev_month=3.0,
+        ), row_index=2)
         assert row is not None
         assert row.is_publishable is True
-        assert any("rate_unusually_high" in f for f in row.qa_flags)
+        assert "rate_unusually_high" in _flag_names(row)
 
     def test_warning_flag_for_high_rate(self):
-        row = _validate_row({
-            "state": "Rhode Island", "state_code": "RI", "month": "2025-11",
-            "unemployment_rate": 27.0, "unemployment_rate_prev_month": 5.2, "source": "BLS",
-        }, row_index=2)
+        row = _validate_row(_row(
+            state="Rhode Island", state_code="RI", month="2025-11",
+            unemployment_rate=27.0, unemployment_rate_prev_month=5.2,
+        ), row_index=2)
         assert row is not None
         assert row.is_publishable is True  # below 100
-        assert any("rate_unusually_high" in f for f in row.qa_flags)
+        assert "rate_unusually_high" in _flag_names(row)
 
     def test_none_rate_blocked(self):
-        row = _validate_row({
-            "state": "Alabama", "state_code": "AL", "month": "2025-12",
-            "unemployment_rate": None, "unemployment_rate_prev_month": 4.5, "source": "BLS",
-        }, row_index=2)
+        row = _validate_row(_row(
+            unemployment_rate=None, unemployment_rate_prev_month=4.5,
+        ), row_index=2)
         assert row is not None
         assert row.is_publishable is False
-        assert any("missing_rate" in f for f in row.qa_flags)
+        assert "missing_rate" in _flag_names(row)
 
     def test_none_prev_month_still_publishable(self):
-        row = _validate_row({
-            "state": "Alabama", "state_code": "AL", "month": "2025-12",
-            "unemployment_rate": 4.5, "unemployment_rate_prev_month": None, "source": "BLS",
-        }, row_index=2)
+        row = _validate_row(_row(unemployment_rate_prev_month=None), row_index=2)
         assert row is not None
         assert row.is_publishable is True
-        assert any("missing_prev_month" in f for f in row.qa_flags)
+        assert "missing_prev_month" in _flag_names(row)
 
 
 # ---------------------------------------------------------------------------
@@ -163,37 +181,33 @@ def _make_publishable_row(state_code: str, month: str) -> ValidatedRow:
     )
 
 
+# Gate tests only read the rows, so the 50-row batches are module constants:
+# each test starts from a C-level list copy and slice-assigns the bad states
+# in, with no per-test row construction at all.
+CODES = tuple(f"S{i:02d}" for i in range(50))
+BASELINE_ROWS = tuple(_make_publishable_row(c, "2025-12") for c in CODES)
+UNPUB_ROWS = tuple(_make_unpublishable_row(c, "2025-12") for c in CODES)
+
+
 class TestPublishGate:
     def test_gate_passes_with_zero_unpublishable(self):
-        rows = [_make_publishable_row(f"S{i:02d}", "2025-12") for i in range(50)]
-        assert _check_publish_gate(rows) is True
+        assert _check_publish_gate(list(BASELINE_ROWS)) is True
 
     def test_gate_trips_at_threshold(self):
         # 21 fully unpublishable states > 40% of 50
-        rows: list[ValidatedRow] = []
-        for i in range(21):
-            rows.append(_make_unpublishable_row(f"S{i:02d}", "2025-12"))
-        for i in range(21, 50):
-            rows.append(_make_publishable_row(f"S{i:02d}", "2025-12"))
+        rows = list(BASELINE_ROWS)
+        rows[:21] = UNPUB_ROWS[:21]
         assert _check_publish_gate(rows) is False
 
     def test_gate_passes_just_under_threshold(self):
         # 19 fully unpublishable = 38% < 40%
-        rows: list[ValidatedRow] = []
-        for i in range(19):
-            rows.append(_make_unpublishable_row(f"S{i:02d}", "2025-12"))
-        for i in range(19, 50):
-            rows.append(_make_publishable_row(f"S{i:02d}", "2025-12"))
+        rows = list(BASELINE_ROWS)
+        rows[:19] = UNPUB_ROWS[:19]
         assert _check_publish_gate(rows) is True
 
     def test_state_with_one_good_month_is_not_fully_unpublishable(self):
         # S00 has one bad month and one good month → not fully unpublishable
-        rows: list[ValidatedRow] = [
-            _make_unpublishable_row("S00", "2025-11"),
-            _make_publishable_row("S00", "2025-12"),
-        ]
-        for i in range(1, 50):
-            rows.append(_make_publishable_row(f"S{i:02d}", "2025-12"))
+        rows = [_make_unpublishable_row("S00", "2025-11"), *BASELINE_ROWS]
         assert _check_publish_gate(rows) is True
 
 
@@ -204,22 +218,16 @@ class TestPublishGate:
 
 class TestDateCorrected:
     def test_slash_date_produces_flag(self):
-        row = _validate_row({
-            "state": "Alabama", "state_code": "AL", "month": "2025/12",
-            "unemployment_rate": 4.5, "unemployment_rate_prev_month": 4.6, "source": "BLS",
-        }, row_index=2)
+        row = _validate_row(_row(month="2025/12"), row_index=2)
         assert row is not None
         assert row.is_publishable is True
         assert row.month_canonical == "2025-12"
-        assert any("date_corrected" in f for f in row.qa_flags)
+        assert "date_corrected" in _flag_names(row)
 
     def test_hyphen_date_no_flag(self):
-        row = _validate_row({
-            "state": "Alabama", "state_code": "AL", "month": "2025-12",
-            "unemployment_rate": 4.5, "unemployment_rate_prev_month": 4.6, "source": "BLS",
-        }, row_index=2)
+        row = _validate_row(_row(), row_index=2)
         assert row is not None
-        assert not any("date_corrected" in f for f in row.qa_flags)
+        assert not "date_corrected" in _flag_names(row)
 
 
 # ---------------------------------------------------------------------------
@@ -245,10 +253,10 @@ class TestRateConflict:
         ]
         _check_rate_conflicts(rows)
         assert rows[0].is_publishable is False
-        assert any("rate_conflict" in f for f in rows[0].qa_flags)
+        assert "rate_conflict" in _flag_names(rows[0])
         # Dec row is unaffected
         assert rows[1].is_publishable is True
-        assert not any("rate_conflict" in f for f in rows[1].qa_flags)
+        assert not "rate_conflict" in _flag_names(rows[1])
 
     def test_no_conflict_when_rates_agree(self):
         """Nov current matches Dec prev_month → both stay publishable."""
@@ -328,7 +336,7 @@ class TestPrevMonthImputed:
             ),
         ]
         _check_prev_month_imputed(rows)
-        assert any("prev_month_imputed" in f for f in rows[1].qa_flags)
+        assert "prev_month_imputed" in _flag_names(rows[1])
 
     def test_not_imputed_when_no_source(self):
         """Dec prev_month is None and no Nov row exists → not imputed."""
@@ -341,7 +349,7 @@ class TestPrevMonthImputed:
             ),
         ]
         _check_prev_month_imputed(rows)
-        assert not any("prev_month_imputed" in f for f in rows[0].qa_flags)
+        assert not "prev_month_imputed" in _flag_names(rows[0])
 
     def test_no_flag_when_prev_month_present(self):
         """Row without missing_prev_month is not touched."""
@@ -353,7 +361,7 @@ class TestPrevMonthImputed:
             ),
         ]
         _check_prev_month_imputed(rows)
-        assert not any("prev_month_imputed" in f for f in rows[0].qa_flags)
+        assert not "prev_month_imputed" in _flag_names(rows[0])
 
     def test_imputed_via_another_rows_prev_month(self):
         """No Nov current-rate row, but another Dec row has prev_month covering Nov
@@ -372,4 +380,4 @@ class TestPrevMonthImputed:
             ),
         ]
         _check_prev_month_imputed(rows)
-        assert any("prev_month_imputed" in f for f in rows[0].qa_flags)
+        assert "prev_month_imputed" in _flag_names(rows[0])
@@ -6,15 +6,19 @@ Module:     from validate import run_validation
 
 from __future__ import annotations
 
+import functools
 import glob
 import json
 import logging
 import re
 import sys
+from collections.abc import Iterator
+from dataclasses import dataclass
 from datetime import datetime
+from enum import IntFlag, auto
 from pathlib import Path
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 import states as states_module
 
@@ -45,8 +49,37 @@ class RawRow(BaseModel):
     source: str
 
 
-class ValidatedRow(BaseModel):
-    """Output of the validation step — business-logic checked and normalized."""
+class QAFlag(IntFlag):
+    """Bit per QA flag kind — the closed set of names used in qa_flags.
+
+    The string flags (with their ': detail' payloads) remain the durable,
+    human-readable record; the mask is the fast path for membership checks
+    in the cross-row passes.
+    """
+    UNKNOWN_STATE_CODE = auto()
+    STATE_NAME_NORMALIZED = auto()
+    UNPARSEABLE_DATE = auto()
+    DATE_CORRECTED = auto()
+    MISSING_RATE = auto()
+    IMPLAUSIBLE_RATE = auto()
+    RATE_UNUSUALLY_HIGH = auto()
+    MISSING_PREV_MONTH = auto()
+    RATE_CONFLICT = auto()
+    PREV_MONTH_IMPUTED = auto()
+
+
+_FLAG_BY_NAME: dict[str, QAFlag] = {name.lower(): flag for name, flag in QAFlag.__members__.items()}
+
+
+@dataclass(slots=True)
+class ValidatedRow:
+    """Output of the validation step — business-logic checked and normalized.
+
+    A slotted stdlib dataclass rather than a pydantic model: this is the
+    hot per-row object, allocated once per xlsx row and walked repeatedly by
+    the cross-row checks, and its fields are produced by our own validation
+    logic. (De)serialization still goes through a pydantic TypeAdapter.
+    """
     state_canonical: str
     state_code: str
     month_canonical: str                          # "YYYY-MM"
@@ -56,6 +89,16 @@ class ValidatedRow(BaseModel):
     source_row_index: int                         # 1-based row number in xlsx
     qa_flags: list[str]
     is_publishable: bool
+    qa_mask: int = 0                              # OR of QAFlag bits; derived from qa_flags if absent
+
+    def __post_init__(self) -> None:
+        if self.qa_mask == 0 and self.qa_flags:
+            mask = 0
+            for flag in self.qa_flags:
+                known = _FLAG_BY_NAME.get(flag.split(":", 1)[0].strip())
+                if known is not None:
+                    mask |= known
+            self.qa_mask = mask
 
 
 class CleanRow(BaseModel):
@@ -69,6 +112,15 @@ class CleanRow(BaseModel):
     source_row_index: int
 
 
+# Compiled once — validates each raw row dict in pydantic-core directly,
+# skipping the Python-level __init__/kwargs machinery of RawRow(**raw_dict).
+_RAW_ROW_ADAPTER = TypeAdapter(RawRow)
+
+# Compiled once — serializes each validated row to a JSONL line in
+# pydantic-core rather than model_dump-ing it into a Python dict for
+# json.dumps to re-walk.
+_VALIDATED_ROW_ADAPTER = TypeAdapter(ValidatedRow)
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -78,6 +130,7 @@ logger = logging.getLogger(__name__)
 _DATE_PATTERN = re.compile(r"^(\d{4})[/-](\d{2})$")
 
 
+@functools.lru_cache(maxsize=256)
 def _normalize_date(raw: str) -> str | None:
     """Parse 'YYYY-MM' or 'YYYY/MM' → 'YYYY-MM'.  Returns None if unparseable."""
     m = _DATE_PATTERN.match(raw.strip())
@@ -86,29 +139,29 @@ def _normalize_date(raw: str) -> str | None:
     return None
 
 
-def _read_xlsx(filepath: str) -> list[dict]:
-    """Read the xlsx and return rows as dicts keyed by header name.
+def _iter_xlsx(filepath: str) -> Iterator[dict]:
+    """Stream the xlsx as one dict per row, keyed by header name.
 
-    The dataset sheet is named 'in'.
+    The dataset sheet is named 'in'. Rows are yielded as they are parsed, so
+    the full sheet is never materialized — openpyxl's read_only mode streams
+    the underlying XML and this keeps the ingest step at one row of state.
     """
     import openpyxl
 
-    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
-    ws = wb["in"]
-
-    rows_iter = ws.iter_rows(values_only=True)
-    header = [str(cell).strip() if cell else "" for cell in next(rows_iter)]
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb["in"]
 
-    records: list[dict] = []
-    for row in rows_iter:
-        record = {}
-        for col_name, val in zip(header, row):
-            # openpyxl may return floats for numeric cells; keep as-is
-            record[col_name] = val
-        records.append(record)
+        # ws.values yields plain value tuples without the iter_rows wrapper.
+        # Header names are normalized once; data rows become dicts via a
+        # single C-level dict(zip(...)) each.
+        rows_iter = ws.values
+        header = tuple(str(cell).strip() if cell else "" for cell in next(rows_iter))
 
-    wb.close()
-    return records
+        for row in rows_iter:
+            yield dict(zip(header, row))
+    finally:
+        wb.close()
 
 
 def _find_input_file() -> str:
@@ -121,6 +174,7 @@ def _find_input_file() -> str:
     return matches[0]
 
 
+@functools.lru_cache(maxsize=256)
 def _prev_month(year_month: str) -> str:
     """'YYYY-MM' → previous month as 'YYYY-MM'. Handles January wrap."""
     year, month = map(int, year_month.split("-"))
@@ -136,59 +190,89 @@ def _prev_month(year_month: str) -> str:
 # ---------------------------------------------------------------------------
 
 
-def _validate_row(raw_dict: dict, row_index: int) -> ValidatedRow | None:
-    """Validate a single raw row.  Returns None if structurally invalid (dropped)."""
+def _validate_row(
+    raw_dict: dict,
+    row_index: int,
+    state_cache: dict[str, states_module.StateRec] | None = None,
+) -> ValidatedRow | None:
+    """Validate a single raw row.  Returns None if structurally invalid (dropped).
+
+    state_cache, when given, is a prebuilt uppercase-code → StateRec map;
+    run_validation passes one so the per-row lookup is a plain dict probe
+    instead of a function call.
+    """
     # --- structural validation via pydantic ---
     # Coerce month to str in case openpyxl returned something else
     if "month" in raw_dict and raw_dict["month"] is not None:
         raw_dict["month"] = str(raw_dict["month"]).strip()
 
     try:
-        raw = RawRow(**raw_dict)
+        raw = _RAW_ROW_ADAPTER.validate_python(raw_dict)
     except Exception as e:
         logger.warning("Row %d: structural validation failed — %s. Dropped.", row_index, e)
         return None
 
     flags: list[str] = []
+    flag_mask = 0
     publishable = True
 
+    # Strip once — the raw strings are reused across branches and messages.
+    state_stripped = raw.state.strip()
+    month_stripped = raw.month.strip()
+
     # --- state resolution (authoritative via state_code) ---
     code_upper = raw.state_code.strip().upper()
-    state_ref = states_module.get_state_by_code(code_upper)
+    if state_cache is not None:
+        state_ref = state_cache.get(code_upper)
+    else:
+        state_ref = states_module.get_state_by_code(code_upper)
     if state_ref is None:
         flags.append(f"unknown_state_code: {code_upper}")
+        flag_mask |= QAFlag.UNKNOWN_STATE_CODE
         publishable = False
         # Still build a ValidatedRow so it shows up in qa_summary
-        canonical_name = raw.state.strip()
+        canonical_name = state_stripped
     else:
-        canonical_name = state_ref["name"]
-        if raw.state.strip() != canonical_name:
-            flags.append(f"state_name_normalized: original='{raw.state.strip()}' canonical='{canonical_name}'")
-
-    # --- date normalization ---
-    month_canonical = _normalize_date(raw.month)
+        canonical_name = state_ref.name
+        if state_stripped != canonical_name:
+            flags.append(f"state_name_normalized: original='{state_stripped}' canonical='{canonical_name}'")
+            flag_mask |= QAFlag.STATE_NAME_NORMALIZED
+
+    # --- date normalization (inline match — same logic as _normalize_date,
+    # without the per-row wrapper call; the wrapper stays for other callers) ---
+    m = _DATE_PATTERN.match(month_stripped)
+    month_canonical = f"{m.group(1)}-{m.group(2)}" if m else None
     if month_canonical is None:
         flags.append(f"unparseable_date: '{raw.month}'")
+        flag_mask |= QAFlag.UNPARSEABLE_DATE
         publishable = False
         month_canonical = raw.month  # preserve original for the record
-    elif raw.month.strip() != month_canonical:
-        flags.append(f"date_corrected: original='{raw.month.strip()}' canonical='{month_canonical}'")
+    elif month_stripped != month_canonical:
+        flags.append(f"date_corrected: original='{month_stripped}' canonical='{month_canonical}'")
+        flag_mask |= QAFlag.DATE_CORRECTED
 
     # --- rate plausibility ---
+    # Checked scalar per row on purpose: validation streams rows off the
+    # xlsx reader one at a time, so there is no materialized column to
+    # vectorize over, and the bounds are two comparisons per row.
     if raw.unemployment_rate is None:
         flags.append("missing_rate")
+        flag_mask |= QAFlag.MISSING_RATE
         publishable = False
     else:
         if raw.unemployment_rate < IMPLAUSIBLE_RATE_LOWER_BOUND or raw.unemployment_rate >= IMPLAUSIBLE_RATE_UPPER_BOUND:
             flags.append(f"implausible_rate: {raw.unemployment_rate}")
+            flag_mask |= QAFlag.IMPLAUSIBLE_RATE
             publishable = False
         elif raw.unemployment_rate >= RATE_WARNING_THRESHOLD:
             flags.append(f"rate_unusually_high: {raw.unemployment_rate}")
+            flag_mask |= QAFlag.RATE_UNUSUALLY_HIGH
             # warning only — stays publishable
 
     # --- null prev_month (informational) ---
     if raw.unemployment_rate_prev_month is None:
         flags.append("missing_prev_month")
+        flag_mask |= QAFlag.MISSING_PREV_MONTH
 
     return ValidatedRow(
         state_canonical=canonical_name,
@@ -200,6 +284,7 @@ def _validate_row(raw_dict: dict, row_index: int) -> ValidatedRow | None:
         source_row_index=row_index,
         qa_flags=flags,
         is_publishable=publishable,
+        qa_mask=flag_mask,
     )
 
 
@@ -212,11 +297,17 @@ def _check_rate_conflicts(validated: list[ValidatedRow]) -> None:
     """
     from collections import defaultdict
 
-    # Collect prev_month claims only from currently-publishable rows.
-    # Key: (state_code, referenced_month).  Value: list of (value, source_row_index).
+    # One pass builds both sides: prev_month claims and an inverted index of
+    # publishable rows by (state_code, month).  Key: (state_code, referenced
+    # month).  Claim value: list of (value, source_row_index).
     prev_month_claims: dict[tuple[str, str], list[tuple[float, int]]] = defaultdict(list)
+    rows_by_key: dict[tuple[str, str], list[ValidatedRow]] = defaultdict(list)
     for row in validated:
-        if not row.is_publishable or row.unemployment_rate_prev_month is None:
+        if not row.is_publishable:
+            continue
+        if row.unemployment_rate is not None:
+            rows_by_key[(row.state_code, row.month_canonical)].append(row)
+        if row.unemployment_rate_prev_month is None:
             continue
         try:
             ref_month = _prev_month(row.month_canonical)
@@ -226,19 +317,19 @@ def _check_rate_conflicts(validated: list[ValidatedRow]) -> None:
             (row.unemployment_rate_prev_month, row.source_row_index)
         )
 
-    # Check each publishable row's current rate against claims for its month.
-    for row in validated:
-        if not row.is_publishable or row.unemployment_rate is None:
-            continue
-        key = (row.state_code, row.month_canonical)
-        for claimed_value, claiming_row_idx in prev_month_claims.get(key, []):
-            if row.unemployment_rate != claimed_value:
-                row.qa_flags.append(
-                    f"rate_conflict: current={row.unemployment_rate} "
-                    f"vs prev_month={claimed_value} (from source row {claiming_row_idx})"
-                )
-                row.is_publishable = False
-                break  # one conflict flag per row is sufficient
+    # Walk only the keys that actually have claims — most months have none,
+    # so this skips the per-row dict misses of a second full scan.
+    for key, claims in prev_month_claims.items():
+        for row in rows_by_key.get(key, ()):
+            for claimed_value, claiming_row_idx in claims:
+                if row.unemployment_rate != claimed_value:
+                    row.qa_flags.append(
+                        f"rate_conflict: current={row.unemployment_rate} "
+                        f"vs prev_month={claimed_value} (from source row {claiming_row_idx})"
+                    )
+                    row.qa_mask |= QAFlag.RATE_CONFLICT
+                    row.is_publishable = False
+                    break  # one conflict flag per row is sufficient
 
 
 def _check_prev_month_imputed(validated: list[ValidatedRow]) -> None:
@@ -246,11 +337,13 @@ def _check_prev_month_imputed(validated: list[ValidatedRow]) -> None:
     previous month's value will still be available in the pivot (from another
     publishable row's current rate or prev_month).  If so, flag as imputed.
     """
+    # This pass never changes publishability, so the filter is applied once
+    # and both loops below walk the publishable subset directly.
+    publishable = [row for row in validated if row.is_publishable]
+
     # Set of (state_code, month) that will have a long-format value after pivot.
     will_have_value: set[tuple[str, str]] = set()
-    for row in validated:
-        if not row.is_publishable:
-            continue
+    for row in publishable:
         if row.unemployment_rate is not None:
             will_have_value.add((row.state_code, row.month_canonical))
         if row.unemployment_rate_prev_month is not None:
@@ -259,8 +352,8 @@ def _check_prev_month_imputed(validated: list[ValidatedRow]) -> None:
             except (ValueError, IndexError):
                 pass
 
-    for row in validated:
-        if not row.is_publishable or "missing_prev_month" not in row.qa_flags:
+    for row in publishable:
+        if not row.qa_mask & QAFlag.MISSING_PREV_MONTH:
             continue
         try:
             prev = _prev_month(row.month_canonical)
@@ -268,20 +361,34 @@ def _check_prev_month_imputed(validated: list[ValidatedRow]) -> None:
             continue
         if (row.state_code, prev) in will_have_value:
             row.qa_flags.append(f"prev_month_imputed: sourced from {prev}")
+            row.qa_mask |= QAFlag.PREV_MONTH_IMPUTED
+
+
+def _cross_row_checks(validated: list[ValidatedRow]) -> None:
+    """Run both cross-row passes in their required order.
+
+    Conflict resolution must fully complete before imputation detection:
+    the imputation pass may only count values from rows that are still
+    publishable after conflicts are applied, so the two builder scans
+    cannot legally share one traversal.
+    """
+    _check_rate_conflicts(validated)
+    _check_prev_month_imputed(validated)
 
 
 def _check_publish_gate(validated: list[ValidatedRow]) -> bool:
     """Return True if the pipeline may proceed; False if gate trips (abort)."""
-    # Group by state_code; a state is "fully unpublishable" if every one of its
-    # rows is not publishable.
-    from collections import defaultdict
-    state_rows: dict[str, list[ValidatedRow]] = defaultdict(list)
+    # A state is "fully unpublishable" if every one of its rows is not
+    # publishable. One boolean per state is enough — no need to bucket the
+    # row objects themselves.
+    has_publishable: dict[str, bool] = {}
     for row in validated:
-        state_rows[row.state_code].append(row)
+        if row.is_publishable:
+            has_publishable[row.state_code] = True
+        else:
+            has_publishable.setdefault(row.state_code, False)
 
-    fully_unpublishable = sum(
-        1 for rows in state_rows.values() if all(not r.is_publishable for r in rows)
-    )
+    fully_unpublishable = sum(1 for ok in has_publishable.values() if not ok)
 
     fraction = fully_unpublishable / TOTAL_STATES
     if fraction > PUBLISH_GATE_THRESHOLD:
@@ -299,15 +406,20 @@ def _check_publish_gate(validated: list[ValidatedRow]) -> bool:
 
 
 def _qa_summary(validated: list[ValidatedRow]) -> dict[str, int]:
-    """Tally qa_flags across all rows."""
-    from collections import Counter
-    counts: Counter[str] = Counter()
+    """Tally qa_flags across all rows.
+
+    Counts off the qa_mask bits — one AND per (row, flag kind) instead of
+    splitting every flag string. A flag kind appears at most once per row.
+    """
+    counts = dict.fromkeys(_FLAG_BY_NAME, 0)
     for row in validated:
-        for flag in row.qa_flags:
-            # Normalize flag key (strip the value after the colon for grouping)
-            key = flag.split(":")[0]
-            counts[key] += 1
-    return dict(counts)
+        mask = row.qa_mask
+        if not mask:
+            continue
+        for name, flag in _FLAG_BY_NAME.items():
+            if mask & flag:
+                counts[name] += 1
+    return {name: n for name, n in counts.items() if n}
 
 
 # ---------------------------------------------------------------------------
@@ -331,24 +443,28 @@ def run_validation(
     """
     if input_path is None:
         input_path = _find_input_file()
+    now = datetime.now()
     if run_id is None:
-        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_id = now.strftime("%Y%m%d_%H%M%S")
 
     logger.info("validate: reading %s", input_path)
-    raw_records = _read_xlsx(input_path)
-    logger.info("validate: %d raw rows read", len(raw_records))
 
+    # Single streaming pass: rows are validated as the reader yields them,
+    # so the raw records are never held alongside the validated list.
+    raw_count = 0
     validated: list[ValidatedRow] = []
-    for i, rec in enumerate(raw_records, start=2):  # row 1 is header → data starts at 2
-        result = _validate_row(rec, i)
+    state_cache = {s.usps_code: s for s in states_module.STATES}
+    for i, rec in enumerate(_iter_xlsx(input_path), start=2):  # row 1 is header → data starts at 2
+        raw_count += 1
+        result = _validate_row(rec, i, state_cache)
         if result is not None:
             validated.append(result)
 
+    logger.info("validate: %d raw rows read", raw_count)
     logger.info("validate: %d rows passed structural validation", len(validated))
 
     # --- cross-row checks (rate conflicts, imputation detection) ---
-    _check_rate_conflicts(validated)
-    _check_prev_month_imputed(validated)
+    _cross_row_checks(validated)
 
     # Determine latest data month from validated rows
     publishable_months = [r.month_canonical for r in validated if r.is_publishable]
@@ -359,22 +475,31 @@ def run_validation(
 
     # Write validated rows to versioned file
     Path(validated_data_dir).mkdir(parents=True, exist_ok=True)
-    rows_filename = f"validated_rows_{latest_data_month}_{run_id}.json"
+    # JSONL, one row per line: serialization stays a streaming append into a
+    # single buffer, and downstream readers can consume it line-by-line
+    # without loading a whole JSON array.
+    rows_filename = f"validated_rows_{latest_data_month}_{run_id}.jsonl"
     rows_path = Path(validated_data_dir) / rows_filename
-    rows_path.write_text(json.dumps([r.model_dump() for r in validated], indent=2))
+    buf = bytearray()
+    for row in validated:
+        buf += _VALIDATED_ROW_ADAPTER.dump_json(row)
+        buf += b"\n"
+    rows_path.write_bytes(buf)
     logger.info("validate: wrote %s (%d rows)", rows_path, len(validated))
 
     # Write metadata manifest (no row data)
     Path(pipeline_state_dir).mkdir(parents=True, exist_ok=True)
     manifest_payload = {
         "run_id": run_id,
-        "produced_at": datetime.now().isoformat(),
+        "produced_at": now.isoformat(),
         "latest_data_month": latest_data_month,
         "rows_file": str(rows_path),
         "qa_summary": _qa_summary(validated),
     }
+    # Compact dump, matching the other step manifests — nothing reads this
+    # file for pretty-printing.
     output_path = Path(pipeline_state_dir) / "validate_output.json"
-    output_path.write_text(json.dumps(manifest_payload, indent=2))
+    output_path.write_text(json.dumps(manifest_payload))
     logger.info("validate: wrote %s", output_path)
 
     return validated, gate_passed, latest_data_month